@@ -1,16 +1,37 @@
+import asyncio
+import aiohttp
 import requests
-from bs4 import BeautifulSoup # type: ignore
+from lxml import etree
 import json
 import logging
 import os
-from typing import Dict, List, Optional, Tuple
+import functools
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import re
+from concurrent.futures import ThreadPoolExecutor
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+from http_client import TIMEOUT, declared_charset, is_html, make_session
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib codec
+    orjson = None
+
+# Handlers are configured by the entry point (main.py)
 logger = logging.getLogger(__name__)
 
+def _json_line(record: Dict) -> bytes:
+    """Serialize one record as a UTF-8 JSON Lines entry."""
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+
 class AttractionsScraper:
+    # Characters stripped from city names before building URLs
+    _SANITIZE_RE = re.compile(r'[^\w\s-]')
+    # Stop parsing pages past this size to bound parse cost
+    MAX_BYTES = 4 * 1024 * 1024
+
     def __init__(self):
         self.base_urls = [
             "https://en.wikipedia.org/wiki/List_of_tourist_attractions_in_{}",
@@ -28,9 +49,16 @@ class AttractionsScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate, br',
         }
+        self.timeout = TIMEOUT
+        
+        # Reuse keep-alive connections across the URL probes
+        self.session = make_session(self.headers)
         self.db_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
         os.makedirs(self.db_dir, exist_ok=True)
+        # Memoized per instance over cache file reads; cleared whenever the file is written
+        self._attractions_cached = functools.lru_cache(maxsize=1024)(self._load_attractions)
         
         # Special cases for city names
         self.city_mappings = {
@@ -68,7 +96,7 @@ class AttractionsScraper:
         """
         # Convert to lowercase and remove special characters
         city = city.lower()
-        city = re.sub(r'[^\w\s-]', '', city)
+        city = self._SANITIZE_RE.sub('', city)
         # Replace spaces with underscores
         city = city.strip().replace(" ", "_")
         
@@ -78,25 +106,191 @@ class AttractionsScraper:
             
         return city
 
+    def _probe_url(self, url: str) -> bool:
+        """
+        Check whether a URL exists without downloading its body.
+        
+        Args:
+            url: Candidate Wikipedia URL
+            
+        Returns:
+            True if the page answered HEAD with a 200
+        """
+        try:
+            head = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+            return head.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
     def _try_urls(self, formatted_city: str) -> Tuple[Optional[str], Optional[requests.Response]]:
         """
         Try different URL patterns until finding a valid one.
         
+        All patterns are probed concurrently; the earliest pattern in
+        base_urls that exists wins, as with the old sequential search.
+        
         Args:
             formatted_city: Formatted city name
             
         Returns:
             Tuple of (successful URL, response object)
         """
-        for base_url in self.base_urls:
-            url = base_url.format(formatted_city)
-            try:
-                response = requests.get(url, headers=self.headers)
-                if response.status_code == 200:
-                    return url, response
-            except requests.exceptions.RequestException:
-                continue
-        return None, None
+        urls = [base_url.format(formatted_city) for base_url in self.base_urls]
+        executor = ThreadPoolExecutor(max_workers=len(urls))
+        try:
+            probes = [executor.submit(self._probe_url, url) for url in urls]
+            for index, probe in enumerate(probes):
+                if not probe.result():
+                    continue
+                try:
+                    # Stream the body so parsing can start before it finishes downloading
+                    response = self.session.get(urls[index], timeout=self.timeout, stream=True)
+                except requests.exceptions.RequestException:
+                    continue
+                if response.status_code != 200 or not is_html(response.headers.get('Content-Type')):
+                    response.close()
+                    continue
+                return urls[index], response
+            return None, None
+        finally:
+            # Don't wait on probes that can no longer win
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _within_list(self, item, content) -> bool:
+        """
+        Check that a <li> sits in a list inside the main content div.
+        
+        Args:
+            item: <li> element
+            content: The mw-content-text element
+            
+        Returns:
+            True if a <ul>/<ol> lies between item and content
+        """
+        in_list = False
+        for ancestor in item.iterancestors():
+            if ancestor is content:
+                return in_list
+            if ancestor.tag in ('ul', 'ol'):
+                in_list = True
+        return False
+
+    def _parse_attractions(self, chunks: Iterable[bytes], city: str, encoding: str = 'utf-8') -> Optional[List[Dict]]:
+        """
+        Extract attractions from a Wikipedia page.
+        
+        The body is fed to lxml's pull parser chunk by chunk, so parsing
+        overlaps with the download when chunks come from a streamed response.
+        Anything past MAX_BYTES is ignored.
+        
+        Args:
+            chunks: Raw page body, in one or more pieces
+            city: City name to tag each attraction with
+            encoding: Body charset, so libxml2 doesn't have to sniff it
+            
+        Returns:
+            List of attractions, or None if the page has no content div
+        """
+        parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        # Slots are reserved when an <li> opens so results keep document order
+        slots = []
+        open_items = {}
+        content = None
+        
+        def handle_events():
+            nonlocal content
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    # Find the main content div
+                    if content is None and elem.tag == 'div' and elem.get('id') == 'mw-content-text':
+                        content = elem
+                    elif elem.tag == 'li' and content is not None and self._within_list(elem, content):
+                        open_items[elem] = len(slots)
+                        slots.append(None)
+                elif elem in open_items:
+                    slots[open_items.pop(elem)] = self._extract_attraction(elem, city)
+        
+        # lxml raises on close() if it was never fed, e.g. for an empty body
+        parser.feed(b'')
+        received = 0
+        for chunk in chunks:
+            remaining = self.MAX_BYTES - received
+            if len(chunk) > remaining:
+                parser.feed(chunk[:remaining])
+                handle_events()
+                logger.warning("Page for %s is larger than %s bytes, parsing the first part only", city, self.MAX_BYTES)
+                break
+            received += len(chunk)
+            parser.feed(chunk)
+            handle_events()
+        parser.close()
+        handle_events()
+        
+        if content is None:
+            logger.warning("No content found for %s", city)
+            return None
+        
+        return [attraction for attraction in slots if attraction]
+
+    def _extract_attraction(self, item, city: str) -> Optional[Dict]:
+        """
+        Build an attraction record from a list item.
+        
+        Args:
+            item: <li> element
+            city: City name to tag the attraction with
+            
+        Returns:
+            Attraction details, or None for an empty item
+        """
+        text = ''.join(item.itertext())
+        
+        # Skip empty items
+        if not text.strip():
+            return None
+        
+        # Find the first <b>, <a> and <img> in a single walk of the subtree
+        found = {}
+        for elem in item.iter('b', 'a', 'img'):
+            if elem.tag not in found:
+                found[elem.tag] = elem
+                if len(found) == 3:
+                    break
+            
+        # Extract attraction name and description
+        bold = found.get('b')
+        if bold is not None:
+            name = ''.join(bold.itertext()).strip()
+        else:
+            # Try to get the first part of the text as name
+            name = text.split('.', 1)[0].strip()
+        
+        # Get description (rest of the text)
+        description = text.replace(name, '').strip()
+        if description.startswith('.'):
+            description = description[1:].strip()
+        
+        # Get Wikipedia link if available
+        link = None
+        link_elem = found.get('a')
+        if link_elem is not None and 'href' in link_elem.attrib:
+            link = f"https://en.wikipedia.org{link_elem.get('href')}"
+        
+        # Get image URL if available
+        image_url = None
+        img_elem = found.get('img')
+        if img_elem is not None and 'src' in img_elem.attrib:
+            image_url = img_elem.get('src')
+            if image_url.startswith('//'):
+                image_url = f"https:{image_url}"
+        
+        return {
+            'name': name,
+            'description': description,
+            'link': link,
+            'image_url': image_url,
+            'city': city
+        }
 
     def scrape_attractions(self, city: str) -> List[Dict]:
         """
@@ -115,115 +309,204 @@ class AttractionsScraper:
             # Try different URL patterns
             url, response = self._try_urls(formatted_city)
             if not url or not response:
-                logger.error(f"No valid Wikipedia page found for {city}")
+                logger.error("No valid Wikipedia page found for %s", city)
                 return []
             
-            logger.info(f"Scraping attractions for {city} from {url}")
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            attractions = []
+            logger.info("Scraping attractions for %s from %s", city, url)
             
-            # Find the main content div
-            content = soup.find('div', {'id': 'mw-content-text'})
-            if not content:
-                logger.warning(f"No content found for {city}")
+            with response:
+                encoding = declared_charset(response.headers.get('Content-Type'))
+                attractions = self._parse_attractions(response.iter_content(65536), city, encoding)
+            if attractions is None:
                 return []
             
-            # Look for lists of attractions
-            lists = content.find_all(['ul', 'ol'])
-            
-            for list_elem in lists:
-                items = list_elem.find_all('li')
-                for item in items:
-                    # Skip empty items
-                    if not item.text.strip():
-                        continue
-                        
-                    # Extract attraction name and description
-                    name = item.find('b')
-                    if name:
-                        name = name.text.strip()
-                    else:
-                        # Try to get the first part of the text as name
-                        name = item.text.split('.')[0].strip()
-                    
-                    # Get description (rest of the text)
-                    description = item.text.replace(name, '').strip()
-                    if description.startswith('.'):
-                        description = description[1:].strip()
-                    
-                    # Get Wikipedia link if available
-                    link = None
-                    link_elem = item.find('a')
-                    if link_elem and 'href' in link_elem.attrs:
-                        link = f"https://en.wikipedia.org{link_elem['href']}"
-                    
-                    # Get image URL if available
-                    image_url = None
-                    img_elem = item.find('img')
-                    if img_elem and 'src' in img_elem.attrs:
-                        image_url = img_elem['src']
-                        if image_url.startswith('//'):
-                            image_url = f"https:{image_url}"
-                    
-                    attraction = {
-                        'name': name,
-                        'description': description,
-                        'link': link,
-                        'image_url': image_url,
-                        'city': city
-                    }
-                    
-                    attractions.append(attraction)
-            
             # Save to JSON file
             self._save_to_json(attractions, city)
             
-            logger.info(f"Found {len(attractions)} attractions for {city}")
+            logger.info("Found %s attractions for %s", len(attractions), city)
             return attractions
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching data from Wikipedia: {str(e)}")
+            logger.error("Error fetching data from Wikipedia: %s", e)
             raise
         except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
+            logger.error("Unexpected error: %s", e)
             raise
     
-    def _save_to_json(self, attractions: List[Dict], city: str) -> None:
+    def _async_session(self) -> aiohttp.ClientSession:
+        """
+        Create an aiohttp session configured like the synchronous one.
+        
+        Returns:
+            Client session; the caller is responsible for closing it
+        """
+        return aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit=50),
+            timeout=aiohttp.ClientTimeout(sock_connect=self.timeout[0], sock_read=self.timeout[1])
+        )
+
+    async def _probe_url_async(self, session: aiohttp.ClientSession, url: str) -> bool:
         """
-        Save attractions data to JSON file.
+        Async counterpart of _probe_url.
         
         Args:
-            attractions: List of attraction data
-            city: City name for the filename
+            session: Open aiohttp session
+            url: Candidate Wikipedia URL
+            
+        Returns:
+            True if the page answered HEAD with a 200
         """
         try:
-            # Format filename
-            filename = f"attractions_{city.lower().replace(' ', '_')}.json"
-            filepath = os.path.join(self.db_dir, filename)
+            async with session.head(url, allow_redirects=True) as head:
+                return head.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def _try_urls_async(self, session: aiohttp.ClientSession, formatted_city: str) -> Tuple[Optional[str], Optional[bytes], str]:
+        """
+        Async counterpart of _try_urls; probes every pattern at once
+        and takes the earliest pattern that exists.
+        
+        Args:
+            session: Open aiohttp session
+            formatted_city: Formatted city name
             
-            # Read existing data if file exists
-            existing_data = []
-            if os.path.exists(filepath):
+        Returns:
+            Tuple of (successful URL, page body, body charset)
+        """
+        urls = [base_url.format(formatted_city) for base_url in self.base_urls]
+        probes = [asyncio.create_task(self._probe_url_async(session, url)) for url in urls]
+        try:
+            # Take patterns in order so the first existing one wins without waiting on the rest
+            for url, probe in zip(urls, probes):
+                if not await probe:
+                    continue
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    logger.warning(f"Could not read existing JSON file {filename}, starting fresh")
+                    async with session.get(url) as response:
+                        if response.status != 200 or not is_html(response.headers.get('Content-Type')):
+                            continue
+                        # Read at most one byte past the cap; the parser truncates the rest
+                        body = bytearray()
+                        async for chunk in response.content.iter_chunked(65536):
+                            body += chunk
+                            if len(body) > self.MAX_BYTES:
+                                break
+                        return url, bytes(body), declared_charset(response.headers.get('Content-Type'))
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    continue
+            return None, None, 'utf-8'
+        finally:
+            for probe in probes:
+                probe.cancel()
+
+    async def scrape_attractions_async(self, city: str, session: Optional[aiohttp.ClientSession] = None) -> List[Dict]:
+        """
+        Async variant of scrape_attractions.
+        
+        Args:
+            city: City name (will be formatted for Wikipedia URL)
+            session: Optional aiohttp session to share across cities
+            
+        Returns:
+            List of attractions with details
+        """
+        if session is None:
+            async with self._async_session() as session:
+                return await self.scrape_attractions_async(city, session)
+        
+        try:
+            formatted_city = self._format_city_name(city)
+            
+            url, body, encoding = await self._try_urls_async(session, formatted_city)
+            if not url or body is None:
+                logger.error("No valid Wikipedia page found for %s", city)
+                return []
+            
+            logger.info("Scraping attractions for %s from %s", city, url)
+            
+            # Parsing is CPU-bound; keep it off the event loop
+            attractions = await asyncio.to_thread(self._parse_attractions, [body], city, encoding)
+            if attractions is None:
+                return []
+            
+            await asyncio.to_thread(self._save_to_json, attractions, city)
+            
+            logger.info("Found %s attractions for %s", len(attractions), city)
+            return attractions
+            
+        except aiohttp.ClientError as e:
+            logger.error("Error fetching data from Wikipedia: %s", e)
+            raise
+        except Exception as e:
+            logger.error("Unexpected error: %s", e)
+            raise
+
+    async def scrape_many_async(self, cities: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Scrape several cities concurrently over one aiohttp session.
+        
+        Args:
+            cities: City names
+            
+        Returns:
+            Mapping of city name to its list of attractions
+        """
+        async with self._async_session() as session:
+            results = await asyncio.gather(*(self.scrape_attractions_async(city, session) for city in cities))
+        return dict(zip(cities, results))
+    
+    def _cache_path(self, city: str) -> str:
+        """
+        Path of the JSON Lines cache file for a city.
+        
+        Args:
+            city: City name for the filename
             
-            # Combine existing and new data
-            combined_data = existing_data + attractions
+        Returns:
+            Absolute path inside the db directory
+        """
+        filename = f"attractions_{city.lower().replace(' ', '_')}.jsonl"
+        return os.path.join(self.db_dir, filename)
+    
+    def _save_to_json(self, attractions: List[Dict], city: str) -> None:
+        """
+        Append attractions data to the city's JSON Lines file.
+        
+        Args:
+            attractions: List of attraction data
+            city: City name for the filename
+        """
+        try:
+            filepath = self._cache_path(city)
             
-            # Write the combined data
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(combined_data, f, indent=2, ensure_ascii=False)
+            # One record per line, so saving never rewrites earlier data
+            with open(filepath, 'ab') as f:
+                f.write(b''.join(_json_line(attraction) for attraction in attractions))
             
-            logger.info(f"Saved {len(attractions)} attractions to {filename}")
+            self._attractions_cached.cache_clear()
+            logger.info("Saved %s attractions to %s", len(attractions), os.path.basename(filepath))
             
         except Exception as e:
-            logger.error(f"Error saving to JSON: {str(e)}")
+            logger.error("Error saving to JSON: %s", e)
             raise
     
+    def _iter_cached(self, filepath: str) -> Iterator[Dict]:
+        """
+        Stream attractions back out of a JSON Lines file.
+        
+        Args:
+            filepath: Cache file to read
+            
+        Yields:
+            One attraction per line
+        """
+        loads = orjson.loads if orjson is not None else json.loads
+        with open(filepath, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+    
     def get_attractions(self, city: str) -> List[Dict]:
         """
         Get attractions for a city, either from cache or by scraping.
@@ -235,17 +518,26 @@ class AttractionsScraper:
             List of attractions
         """
         try:
-            # Check if we have cached data
-            filename = f"attractions_{city.lower().replace(' ', '_')}.json"
-            filepath = os.path.join(self.db_dir, filename)
-            
-            if os.path.exists(filepath):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            # Only file reads are memoized, so a failed scrape is retried next time
+            if os.path.exists(self._cache_path(city)):
+                # Copy so callers can't mutate the memoized list
+                return list(self._attractions_cached(city.lower()))
             
             # If no cached data, scrape it
             return self.scrape_attractions(city)
             
         except Exception as e:
-            logger.error(f"Error getting attractions: {str(e)}")
-            raise 
\ No newline at end of file
+            logger.error("Error getting attractions: %s", e)
+            raise
+    
+    def _load_attractions(self, city: str) -> List[Dict]:
+        """
+        Read a city's attractions from the JSON cache.
+        
+        Args:
+            city: Lowercased city name
+            
+        Returns:
+            List of attractions
+        """
+        return list(self._iter_cached(self._cache_path(city)))
@@ -1,21 +1,48 @@
 import requests
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+import codecs
 import json
 import os
 import logging
+import atexit
+import threading
+from cachetools import TTLCache
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+from http_client import TIMEOUT, declared_charset, is_html, make_session
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib codec
+    orjson = None
+
+# Handlers are configured by the entry point (main.py)
 logger = logging.getLogger(__name__)
 
 class BookingScraper:
-    def __init__(self, location):
+    # Possible locations of the price, tried in order
+    PRICE_SELECTORS = (
+        'span[data-testid="price-and-discounted-price"]',
+        'span[data-testid="price-and-discounted-price"] span',
+        'div[data-testid="price-for-x-nights"]',
+        'span[data-testid="price-and-discounted-price"] div'
+    )
+    # Upper bound on how much of a results page gets downloaded and parsed
+    MAX_BYTES = 4 * 1024 * 1024
+    # How long scraped results for a location are reused, in seconds
+    RESULTS_TTL = 15 * 60
+
+    def __init__(self):
         self.base_url = "https://www.booking.com/searchresults.html"
-        self.location = location
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Cache-Control': 'max-age=0',
@@ -27,11 +54,41 @@ class BookingScraper:
             'Sec-Fetch-Site': 'none',
             'Sec-Fetch-User': '?1'
         }
+        self.timeout = TIMEOUT
+        
+        # Reuse keep-alive connections to booking.com
+        self.session = make_session(self.headers)
+        
+        # Scraped hotels waiting to be written to disk
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_every = 50
+        atexit.register(self._flush)
+        
+        # Recent results per normalized location
+        self._results = TTLCache(maxsize=256, ttl=self.RESULTS_TTL)
+        self._results_lock = threading.Lock()
+
+    def fetch_hotels(self, location):
+        # Same search within the TTL window is served without hitting Booking.com
+        key = location.strip().casefold()
+        with self._results_lock:
+            cached = self._results.get(key)
+        if cached is not None:
+            logger.info("Using cached hotels for location: %s", location)
+            return list(cached)
+        
+        hotels = self._scrape_hotels(location)
+        if hotels:
+            with self._results_lock:
+                self._results[key] = list(hotels)
+        return hotels
 
-    def fetch_hotels(self):
+    def _scrape_hotels(self, location):
         try:
             params = {
-                'ss': self.location,
+                'ss': location,
                 'rows': 10,
                 'checkin': '2024-03-01',
                 'checkout': '2024-03-02',
@@ -40,15 +97,28 @@ class BookingScraper:
                 'selected_currency': 'USD'
             }
             
-            logger.info(f"Fetching hotels for location: {self.location}")
-            response = requests.get(self.base_url, params=params, headers=self.headers)
-            response.raise_for_status()
+            logger.info("Fetching hotels for location: %s", location)
+            with self.session.get(self.base_url, params=params, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                if not is_html(content_type):
+                    logger.warning("Unexpected content type from Booking.com: %s", content_type)
+                    return []
+                # One byte past the cap tells us whether the page was cut off
+                body = response.raw.read(self.MAX_BYTES + 1, decode_content=True)
+            if len(body) > self.MAX_BYTES:
+                logger.warning("Results page for %s is larger than %s bytes, parsing the first part only", location, self.MAX_BYTES)
+                body = body[:self.MAX_BYTES]
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Booking.com declares utf-8, which Lexbor takes as raw bytes without sniffing
+            charset = declared_charset(content_type)
+            if codecs.lookup(charset).name != 'utf-8':
+                body = body.decode(charset, errors='replace')
+            tree = LexborHTMLParser(body)
             hotels = []
 
             # Updated selectors for the current Booking.com structure
-            hotel_blocks = soup.find_all('div', {'data-testid': 'property-card'})
+            hotel_blocks = tree.css('div[data-testid="property-card"]')
             
             if not hotel_blocks:
                 logger.warning("No hotel blocks found. The page structure might have changed.")
@@ -57,33 +127,26 @@ class BookingScraper:
             for hotel in hotel_blocks:
                 try:
                     # Get hotel name
-                    name_element = hotel.find('div', {'data-testid': 'title'})
-                    name = name_element.text.strip() if name_element else 'N/A'
+                    name_element = hotel.css_first('div[data-testid="title"]')
+                    name = name_element.text(strip=True) if name_element else 'N/A'
                     
                     # Get price - trying multiple possible selectors
                     price = 'N/A'
-                    price_selectors = [
-                        'span[data-testid="price-and-discounted-price"]',
-                        'span[data-testid="price-and-discounted-price"] span',
-                        'div[data-testid="price-for-x-nights"]',
-                        'span[data-testid="price-and-discounted-price"] div'
-                    ]
-                    
-                    for selector in price_selectors:
-                        price_element = hotel.select_one(selector)
+                    for selector in self.PRICE_SELECTORS:
+                        price_element = hotel.css_first(selector)
                         if price_element:
-                            price = price_element.text.strip()
+                            price = price_element.text(strip=True)
                             # Clean up the price text
                             price = price.replace('$', '').replace(',', '').strip()
                             break
                     
                     # Get rating
-                    rating_element = hotel.find('div', {'data-testid': 'review-score'})
-                    rating = rating_element.text.strip() if rating_element else 'N/A'
+                    rating_element = hotel.css_first('div[data-testid="review-score"]')
+                    rating = rating_element.text(strip=True) if rating_element else 'N/A'
                     
                     # Get link
-                    link_element = hotel.find('a', {'data-testid': 'title-link'})
-                    link = link_element['href'] if link_element else None
+                    link_element = hotel.css_first('a[data-testid="title-link"]')
+                    link = link_element.attributes.get('href') if link_element else None
                     
                     if name and link:  # Only add if we have at least a name and link
                         hotels.append({
@@ -92,13 +155,13 @@ class BookingScraper:
                             'rating': rating,
                             'link': f"https://www.booking.com{link}" if link else 'N/A'
                         })
-                        logger.info(f"Found hotel: {name} - Price: {price}")
+                        logger.debug("Found hotel: %s - Price: %s", name, price)
                 except Exception as e:
-                    logger.error(f"Error processing hotel block: {str(e)}")
+                    logger.error("Error processing hotel block: %s", e)
                     continue
 
             if hotels:
-                logger.info(f"Successfully found {len(hotels)} hotels")
+                logger.info("Successfully found %s hotels", len(hotels))
                 self._save_to_json(hotels)
                 return hotels
             else:
@@ -106,40 +169,67 @@ class BookingScraper:
                 return []
 
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching data from Booking.com: {str(e)}")
+            logger.error("Error fetching data from Booking.com: %s", e)
             raise Exception(f"Failed to fetch hotel data: {str(e)}")
         except Exception as e:
-            logger.error(f"Unexpected error: {str(e)}")
+            logger.error("Unexpected error: %s", e)
             raise Exception(f"An unexpected error occurred: {str(e)}")
 
-    def _save_to_json(self, data, filename="hotels_data.json"):
-        try:
-            # Create db directory if it doesn't exist
-            db_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db")
-            os.makedirs(db_dir, exist_ok=True)
-            
-            file_path = os.path.join(db_dir, filename)
-            
-            # Read existing data if file exists
-            existing_data = []
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    logger.warning(f"Could not read existing JSON file {filename}, starting fresh")
+    def _save_to_json(self, data):
+        # Buffer hotels and only touch the file once enough have piled up
+        with self._pending_lock:
+            self._pending.extend(data)
+            if len(self._pending) < self._flush_every:
+                return
+        self._flush()
+
+    def _flush(self, filename="hotels_data.json"):
+        # Serialize flushes so concurrent read-modify-write cycles can't drop rows.
+        # The thread lock covers this process; the file lock covers other workers.
+        with self._flush_lock:
+            with self._pending_lock:
+                data, self._pending = self._pending, []
+            if not data:
+                return
+            try:
+                # Create db directory if it doesn't exist
+                db_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db")
+                os.makedirs(db_dir, exist_ok=True)
+                
+                file_path = os.path.join(db_dir, filename)
+                
+                with open(file_path + ".lock", 'a') as lock_file:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    
+                    # Read existing data if file exists
                     existing_data = []
-            
-            # Combine existing and new data
-            combined_data = existing_data + data
-            
-            # Write the combined data
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(combined_data, f, indent=2)
-            
-            logger.info(f"Successfully saved {len(data)} hotels to {filename}")
-            
-        except Exception as e:
-            logger.error(f"Error saving to JSON: {str(e)}")
-            # Don't raise the exception, just log it
-            # This way, even if saving fails, the API will still return the hotel data 
\ No newline at end of file
+                    if os.path.exists(file_path):
+                        try:
+                            with open(file_path, 'rb') as f:
+                                raw = f.read()
+                            existing_data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+                        except json.JSONDecodeError:
+                            logger.warning("Could not read existing JSON file %s, starting fresh", filename)
+                            existing_data = []
+                    
+                    # Combine existing and new data
+                    combined_data = existing_data + data
+                    
+                    # Write the combined data to a temp file and swap it in, so
+                    # a reader never sees a half-written file
+                    if orjson is not None:
+                        payload = orjson.dumps(combined_data, option=orjson.OPT_INDENT_2)
+                    else:
+                        payload = json.dumps(combined_data, indent=2).encode('utf-8')
+                    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(payload)
+                    os.replace(tmp_path, file_path)
+                
+                logger.info("Successfully saved %s hotels to %s", len(data), filename)
+                
+            except Exception as e:
+                logger.error("Error saving to JSON: %s", e)
+                # Don't raise the exception, just log it
+                # This way, even if saving fails, the API will still return the hotel data 
\ No newline at end of file
@@ -0,0 +1,78 @@
+import codecs
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Handlers are configured by the entry point (main.py)
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeout shared by the scrapers, in seconds
+TIMEOUT = (3.05, 10)
+
+class CappedRetry(Retry):
+    """
+    Retry that honours Retry-After, but never waits longer than backoff_max,
+    so a server can't park a pooled worker thread for minutes.
+    """
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.backoff_max)
+
+def make_session(headers):
+    """
+    Build a requests session with connection pooling and retries.
+    Parameters:
+        headers (dict): Default headers sent with every request.
+    Returns:
+        requests.Session: Session with the adapter mounted for http and https.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_maxsize=20,
+        # Capped, jittered backoff; other 4xx responses are final and not retried
+        max_retries=CappedRetry(
+            total=2,
+            backoff_factor=0.3,
+            backoff_max=10,
+            backoff_jitter=0.3,
+            status_forcelist=[408, 429, 500, 502, 503, 504]
+        )
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(headers)
+    return session
+
+def is_html(content_type):
+    """
+    Check a Content-Type header before spending time parsing the body.
+    Parameters:
+        content_type (str): Raw header value, if any.
+    Returns:
+        bool: True for text/html responses, whatever the case.
+    """
+    return bool(content_type) and content_type.split(';', 1)[0].strip().lower() == 'text/html'
+
+
+def declared_charset(content_type):
+    """
+    Read the charset declared in a Content-Type header.
+    Parameters:
+        content_type (str): Raw header value, if any.
+    Returns:
+        str: Declared charset, or utf-8 when it is absent or not a known codec.
+    """
+    for param in (content_type or '').split(';')[1:]:
+        key, _, value = param.partition('=')
+        if key.strip().lower() == 'charset' and value.strip():
+            charset = value.strip().strip('"')
+            try:
+                codecs.lookup(charset)
+            except LookupError:
+                logger.warning("Unknown charset %r, decoding as utf-8", charset)
+                return 'utf-8'
+            return charset
+    return 'utf-8'
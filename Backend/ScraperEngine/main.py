@@ -1,8 +1,43 @@
-from fastapi import FastAPI, Query, HTTPException
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from fastapi import FastAPI, Query, HTTPException, Request, Response
 from visa.passportindex_scraper import PassportIndexVisaScraper
 from hotels.booking_scraper import BookingScraper
 import uvicorn
 
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib codec
+    orjson = None
+
+def render_json(payload) -> bytes:
+    """
+    Encode payload as compact UTF-8 JSON.
+    orjson encodes the hotel lists faster than the stdlib encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+# The only logging setup for the service. Request threads just enqueue
+# records and a listener thread does the writes.
+log_level = getattr(logging, os.environ.get("LOG_LEVEL", "INFO").upper(), logging.INFO)
+log_queue = queue.Queue(-1)
+logging.basicConfig(level=log_level, handlers=[logging.handlers.QueueHandler(log_queue)], force=True)
+# HTTP client internals are only worth logging when asked for with LOG_HTTP=1
+if not os.environ.get("LOG_HTTP"):
+    for noisy in ("urllib3", "aiohttp"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(), respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 app = FastAPI(
     title="FlightME Scraper API",
     description="API for fetching visa requirements and hotel information",
@@ -10,9 +45,31 @@ app = FastAPI(
 )
 
 scraper = PassportIndexVisaScraper()
+# Shared so the HTTP connection pool survives between requests
+hotel_scraper = BookingScraper()
+
+# Visa data only changes on redeploy
+VISA_MAX_AGE = 3600
+
+def cacheable_response(request: Request, payload, max_age: int) -> Response:
+    """
+    Wrap payload in a JSON response with ETag and Cache-Control headers.
+    Answers 304 with no body when the client already holds this version.
+    """
+    body = render_json(payload)
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate=86400"
+    }
+    client_tags = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in client_tags or f"W/{etag}" in client_tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.get("/visa-requirements/")
 async def get_visa_requirements(
+    request: Request,
     nationality: str = Query(..., description="Full country name (e.g., 'United States', 'India')"),
     destination: str = Query(..., description="Full country name (e.g., 'United Kingdom', 'Japan')"),
     code_type: str = Query("full", description="'full' for full country names, 'iso2' for ISO codes")
@@ -29,8 +86,9 @@ async def get_visa_requirements(
     - JSON object containing nationality, destination, and visa requirement
     """
     try:
-        result = scraper.fetch(nationality=nationality, destination=destination, code_type=code_type)
-        return result
+        # Run blocking scraper work in a thread so the event loop stays free
+        result = await asyncio.to_thread(scraper.fetch, nationality=nationality, destination=destination, code_type=code_type)
+        return cacheable_response(request, result, VISA_MAX_AGE)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except FileNotFoundError as e:
@@ -40,6 +98,7 @@ async def get_visa_requirements(
 
 @app.get("/hotels/")
 async def get_hotels(
+    request: Request,
     location: str = Query(..., description="City or location to search for hotels (e.g., 'Paris', 'New York')")
 ):
     """
@@ -52,11 +111,22 @@ async def get_hotels(
     - JSON array containing hotel information including name, price, rating, and booking link
     """
     try:
-        hotel_scraper = BookingScraper(location)
-        hotels = hotel_scraper.fetch_hotels()
-        return hotels
+        hotels = await asyncio.to_thread(hotel_scraper.fetch_hotels, location)
+        if not hotels:
+            # Often a transient block; the scraper doesn't keep these either
+            return Response(content=render_json(hotels), media_type="application/json", headers={"Cache-Control": "no-store"})
+        # Matches how long the scraper itself reuses results for a location
+        return cacheable_response(request, hotels, BookingScraper.RESULTS_TTL)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while fetching hotels: {str(e)}")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # For production, run several worker processes, e.g.
+    #   gunicorn -w 4 -k uvicorn.workers.UvicornWorker main:app
+    # or set WEB_CONCURRENCY here. Workers don't share memory, so each keeps
+    # its own visa tables and connection pools.
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    if workers > 1:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
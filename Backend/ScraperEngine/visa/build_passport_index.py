@@ -0,0 +1,30 @@
+"""
+Build the msgpack lookup files read by PassportIndexVisaScraper.
+
+Run from Backend/ScraperEngine at deploy time:
+    python -m visa.build_passport_index
+"""
+import logging
+import os
+
+import msgpack
+
+from visa.passportindex_scraper import PassportIndexVisaScraper, read_passport_index_csv
+
+logger = logging.getLogger(__name__)
+
+def build():
+    scraper = PassportIndexVisaScraper()
+    for code_type, data_file in scraper.data_files.items():
+        if not os.path.exists(data_file):
+            logger.warning("Skipping %s: %s not found", code_type, data_file)
+            continue
+        requirements = read_passport_index_csv(data_file)
+        lookup_file = scraper.lookup_files[code_type]
+        with open(lookup_file, 'wb') as f:
+            f.write(msgpack.packb(requirements, use_bin_type=True))
+        logger.info("Wrote %s passports to %s", len(requirements), lookup_file)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build()
@@ -1,12 +1,63 @@
 import csv
+import functools
 import json
 import os
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib codec
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # prebuilt lookup files are optional
+    msgpack = None
+
+# Handlers are configured by the entry point (main.py)
 logger = logging.getLogger(__name__)
 
+def read_passport_index_csv(path):
+    """
+    Parse a passport index CSV into a nested lookup dict.
+    Returns:
+        dict: passport -> {destination: requirement}
+    """
+    requirements = {}
+    # Imported here, not at module load: pyarrow is heavy, optional, and
+    # only needed when no prebuilt lookup file exists
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:  # the stdlib csv module is used instead
+        pacsv = None
+    if pacsv is not None and os.path.getsize(path) > 0:
+        # Tokenize in Arrow's C++ reader; only the dict building stays in Python
+        columns = ('Passport', 'Destination', 'Requirement')
+        table = pacsv.read_csv(
+            path,
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in columns},
+                include_columns=list(columns)
+            )
+        )
+        passports, destinations, values = (table.column(name).to_pylist() for name in columns)
+        for passport, destination, requirement in zip(passports, destinations, values):
+            requirements.setdefault(passport, {})[destination] = requirement
+        return requirements
+
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if header is None:
+            return requirements
+        # Index columns once instead of building a dict per row
+        pi, di, ri = header.index('Passport'), header.index('Destination'), header.index('Requirement')
+        for row in reader:
+            requirements.setdefault(row[pi], {})[row[di]] = row[ri]
+    return requirements
+
+
 class PassportIndexVisaScraper:
     def __init__(self):
         # Get the directory where the script is located
@@ -15,7 +66,51 @@ class PassportIndexVisaScraper:
             'full': os.path.join(script_dir, 'data', 'passport-index-tidy.csv'),
             'iso2': os.path.join(script_dir, 'data', 'passport-index-tidy-iso2.csv')
         }
-        logger.info(f"Data files initialized: {self.data_files}")
+        # Prebuilt by visa/build_passport_index.py; used instead of the CSVs when present
+        self.lookup_files = {
+            code_type: os.path.splitext(path)[0] + '.msgpack'
+            for code_type, path in self.data_files.items()
+        }
+        logger.info("Data files initialized: %s", self.data_files)
+        # Parsed tables per code_type, loaded on first use
+        self._tables = {}
+        # Memoized per instance so repeated pairs skip validation entirely
+        self._fetch_cached = functools.lru_cache(maxsize=4096)(self._lookup)
+
+    def _load_table(self, code_type):
+        """
+        Load the dataset for code_type on first use, preferring the prebuilt
+        msgpack lookup file over parsing the CSV unless the CSV is newer.
+        Returns:
+            tuple: (passport -> {destination: requirement} dict, set of all destinations)
+        """
+        if code_type in self._tables:
+            return self._tables[code_type]
+
+        data_file = self.data_files.get(code_type)
+        if not data_file or not os.path.exists(data_file):
+            raise FileNotFoundError(f"Data file {data_file} not found.")
+
+        lookup_file = self.lookup_files[code_type]
+        use_lookup = msgpack is not None and os.path.exists(lookup_file)
+        if use_lookup and os.path.getmtime(lookup_file) < os.path.getmtime(data_file):
+            # The CSV was updated after the build; don't serve outdated rules
+            logger.warning("%s is older than %s, reading the CSV instead; "
+                           "re-run visa/build_passport_index.py to rebuild it", lookup_file, data_file)
+            use_lookup = False
+        if use_lookup:
+            with open(lookup_file, 'rb') as f:
+                requirements = msgpack.unpackb(f.read(), raw=False)
+            logger.info("Loaded %s into memory", lookup_file)
+        else:
+            requirements = read_passport_index_csv(data_file)
+            logger.info("Loaded %s into memory", data_file)
+
+        destinations = set()
+        for available in requirements.values():
+            destinations.update(available)
+        self._tables[code_type] = (requirements, destinations)
+        return self._tables[code_type]
 
     def fetch(self, nationality, destination, code_type='full'):
         """
@@ -25,92 +120,62 @@ class PassportIndexVisaScraper:
             destination (str): Full country name (default) or ISO 2-letter code.
             code_type (str): 'full' for full country names (default), 'iso2' for ISO codes.
         """
-        data_file = self.data_files.get(code_type)
-        if not data_file or not os.path.exists(data_file):
-            raise FileNotFoundError(f"Data file {data_file} not found.")
-
         nationality = nationality.strip()
         destination = destination.strip()
-        logger.info(f"Searching for visa requirements from {nationality} to {destination}")
+        logger.info("Searching for visa requirements from %s to %s", nationality, destination)
 
-        with open(data_file, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            # First, verify these countries exist in our dataset
-            countries = set()
-            passports = set()
-            destinations = set()
-            csvfile.seek(0)
-            next(reader)  # Skip header
-            for row in reader:
-                countries.add(row['Passport'])
-                countries.add(row['Destination'])
-                passports.add(row['Passport'])
-                destinations.add(row['Destination'])
-            
-            logger.info(f"Found {len(passports)} passport countries and {len(destinations)} destination countries")
-            
-            if nationality not in passports:
-                logger.error(f"Nationality '{nationality}' not found in dataset")
-                similar = [c for c in passports if nationality.lower() in c.lower()]
-                if similar:
-                    raise ValueError(f"Nationality '{nationality}' not found. Did you mean one of these? {similar}")
-                raise ValueError(f"Nationality '{nationality}' not found. Available passports include: {sorted(list(passports))[:5]}...")
-            
-            if destination not in destinations:
-                logger.error(f"Destination '{destination}' not found in dataset")
-                similar = [c for c in destinations if destination.lower() in c.lower()]
-                if similar:
-                    raise ValueError(f"Destination '{destination}' not found. Did you mean one of these? {similar}")
-                raise ValueError(f"Destination '{destination}' not found. Available destinations include: {sorted(list(destinations))[:5]}...")
-            
-            # Reset file pointer and skip header
-            csvfile.seek(0)
-            next(reader)
-            
-            # Search for the specific combination
-            found_nationality = False
-            found_destination = False
-            for row in reader:
-                if row['Passport'] == nationality:
-                    found_nationality = True
-                    if row['Destination'] == destination:
-                        found_destination = True
-                        result = {
-                            "nationality": nationality,
-                            "destination": destination,
-                            "visa_requirement": row['Requirement']
-                        }
-                        logger.info(f"Found match: {result}")
-                        self._save_to_json(result)
-                        return result
-
-            if not found_nationality:
-                logger.error(f"No entries found for nationality: {nationality}")
-            elif not found_destination:
-                logger.error(f"Found entries for {nationality} but none for destination: {destination}")
-                # Let's find what destinations are available for this nationality
-                csvfile.seek(0)
-                next(reader)
-                available_destinations = set()
-                for row in reader:
-                    if row['Passport'] == nationality:
-                        available_destinations.add(row['Destination'])
-                if available_destinations:
-                    raise ValueError(f"Destination '{destination}' not found for {nationality}. Available destinations include: {sorted(list(available_destinations))[:5]}...")
+        # Copy so callers can't mutate the cached entry
+        result = dict(self._fetch_cached(nationality, destination, code_type))
+        logger.info("Found match: %s", result)
+        self._save_to_json(result)
+        return result
+
+    def _lookup(self, nationality, destination, code_type):
+        """
+        Look up the requirement for an already-normalized country pair.
+        Raises ValueError with suggestions when either country is unknown.
+        """
+        requirements, destinations = self._load_table(code_type)
+        passports = requirements.keys()
+
+        logger.info("Found %s passport countries and %s destination countries", len(passports), len(destinations))
+        
+        if nationality not in passports:
+            logger.error("Nationality '%s' not found in dataset", nationality)
+            similar = [c for c in passports if nationality.lower() in c.lower()]
+            if similar:
+                raise ValueError(f"Nationality '{nationality}' not found. Did you mean one of these? {similar}")
+            raise ValueError(f"Nationality '{nationality}' not found. Available passports include: {sorted(list(passports))[:5]}...")
+        
+        if destination not in destinations:
+            logger.error("Destination '%s' not found in dataset", destination)
+            similar = [c for c in destinations if destination.lower() in c.lower()]
+            if similar:
+                raise ValueError(f"Destination '{destination}' not found. Did you mean one of these? {similar}")
+            raise ValueError(f"Destination '{destination}' not found. Available destinations include: {sorted(list(destinations))[:5]}...")
+        
+        available_destinations = requirements[nationality]
+        if destination in available_destinations:
+            return {
+                "nationality": nationality,
+                "destination": destination,
+                "visa_requirement": available_destinations[destination]
+            }
+
+        logger.error("Found entries for %s but none for destination: %s", nationality, destination)
+        if available_destinations:
+            raise ValueError(f"Destination '{destination}' not found for {nationality}. Available destinations include: {sorted(list(available_destinations))[:5]}...")
             
         raise ValueError(f"No visa requirement data found for {nationality} to {destination}.")
 
-    def _save_to_json(self, data, filename="visa_data.json"):
+    def _save_to_json(self, data, filename="visa_data.jsonl"):
         script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         path = os.path.join(script_dir, "db", filename)
         os.makedirs(os.path.dirname(path), exist_ok=True)
-        if os.path.exists(path):
-            with open(path, "r+", encoding="utf-8") as f:
-                content = json.load(f)
-                content.append(data)
-                f.seek(0)
-                json.dump(content, f, indent=2)
+        # Append one JSON object per line instead of rewriting the whole file
+        if orjson is not None:
+            line = orjson.dumps(data) + b"\n"
         else:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump([data], f, indent=2) 
\ No newline at end of file
+            line = json.dumps(data).encode("utf-8") + b"\n"
+        with open(path, "ab") as f:
+            f.write(line)